@@ -3,7 +3,9 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import altair as alt
-import sqlite3, os, re, hashlib, time
+import openpyxl
+import sqlite3, os, re, io, hashlib, time, threading
+from contextlib import contextmanager
 from datetime import date  # enkel voor labels, geen vergelijkingen
 
 st.set_page_config(page_title="Voorraad App", layout="wide")
@@ -20,9 +22,17 @@ section[data-testid="stSidebar"] {background:#201915;color:#fff;}
 """
 st.markdown(SIDEBAR_CSS, unsafe_allow_html=True)
 
+# Arrow-strings: vectoriële str-kernels (C++) en ~half zo groot als object-strings
+ARROW_STR = "string[pyarrow]"
+
 # ============ Utils ============ #
 def to_num(x):
-    return pd.to_numeric(pd.Series(x).astype(str).str.replace(",",".",regex=False), errors="coerce").fillna(0)
+    s = x if isinstance(x, pd.Series) else pd.Series(x)
+    if pd.api.types.is_numeric_dtype(s):  # al numeriek: geen string-omweg nodig
+        return s.fillna(0)
+    # Arrow-string: replace draait in de C++-kernel i.p.v. per Python-object
+    r = pd.to_numeric(s.astype(str).astype(ARROW_STR).str.replace(",",".",regex=False), errors="coerce").fillna(0)
+    return r.astype(getattr(r.dtype, "numpy_dtype", r.dtype))  # Int64/Float64 -> int64/float64 zoals voorheen
 
 def to_int(x, default=0):
     try:
@@ -31,11 +41,25 @@ def to_int(x, default=0):
     except Exception:
         return default
 
+# EAN als Arrow-string: sneller hashen bij merge/groupby/map
+EAN_DTYPE = ARROW_STR
+
+def norm_ean(x) -> pd.Series:
+    # EAN één keer canoniek maken bij inlezen; verderop niet opnieuw strippen
+    s = x if isinstance(x, pd.Series) else pd.Series(x)
+    return s.astype(str).str.strip().astype(EAN_DTYPE)
+
+def frame_key(df: pd.DataFrame, cols=None) -> str:
+    # vectoriële hash over alleen de opgegeven kolommen; kolomnamen tellen mee
+    d = df if cols is None else df[cols]
+    h = hashlib.blake2b(str(list(d.columns)).encode(), digest_size=16)
+    h.update(pd.util.hash_pandas_object(d, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
 def df_hash(df: pd.DataFrame, cols=None) -> str:
     if df is None or len(df)==0:
         return "empty"
-    d = df if cols is None else df[cols]
-    return hashlib.md5(d.to_csv(index=False).encode()).hexdigest()
+    return frame_key(df, cols)  # i.p.v. to_csv + md5: geen tekstserialisatie van elke cel
 
 def ensure_df(obj, expected_cols=None) -> pd.DataFrame:
     if isinstance(obj, pd.DataFrame):
@@ -49,9 +73,10 @@ def ensure_df(obj, expected_cols=None) -> pd.DataFrame:
     else:
         df = pd.DataFrame()
     if expected_cols:
-        for c in expected_cols:
-            if c not in df.columns:
-                df[c] = "" if c in ["EAN","Referentie","Leverancier","Titel"] else 0
+        missing = [c for c in expected_cols if c not in df.columns]
+        if missing:  # in één concat toevoegen i.p.v. een insert per kolom
+            df = pd.concat([df, pd.DataFrame(
+                {c: "" if c in ["EAN","Referentie","Leverancier","Titel"] else 0 for c in missing}, index=df.index)], axis=1)
         df = df[[c for c in expected_cols if c in df.columns] + [c for c in df.columns if c not in expected_cols]]
     return df
 
@@ -67,20 +92,94 @@ PATTERNS = {
                         r"verkoopprognose\s*min\s*\(\s*totaal\s*4\s*w\s*\)"],
     "stock_days": [r"voorraad\s*dagen", r"dagen\s*voorraad", r"days\s*of\s*supply", r"dos\b", r"voorraad\s*in\s*dagen"],
 }
+EAN_PATTERN = r"\d{8,14}"  # EAN-8 t/m GTIN-14
 REQ_ORDER = ["EAN","Referentie","Titel","Vrije voorraad","Verkopen (Totaal)","Verkoopprognose min (Totaal 4w)"]
 BASE_COLS = REQ_ORDER + ["Voorraad dagen"]
+# eenmalig compileren bij import; per sleutel één alternatie i.p.v. losse patronen na elkaar
+COMPILED_PATTERNS = {k: re.compile("|".join(f"(?:{p})" for p in pats), re.I) for k, pats in PATTERNS.items()}
 
 def auto_map(df):
     m={}
-    for k, pats in PATTERNS.items():
-        for c in df.columns:
-            if any(re.search(p, str(c).strip().lower(), re.I) for p in pats):
-                m[k]=c; break
+    cols_lower = [str(c).strip().lower() for c in df.columns]  # één keer, niet per sleutel/patroon
+    for k, rx in COMPILED_PATTERNS.items():
+        for i, cl in enumerate(cols_lower):
+            if rx.search(cl):
+                m[k]=df.columns[i]; break
     return m
 
-def read_excel_all(file):
-    x = pd.read_excel(file, sheet_name=None, dtype=str)
-    return {s: d.rename(columns=lambda c: str(c).strip()) for s,d in x.items()}
+def read_excel_any(file, **kw):
+    try:
+        # calamine (Rust) parseert xlsx native; vele malen sneller dan openpyxl
+        return pd.read_excel(file, dtype=str, engine="calamine", **kw)
+    except (ImportError, ValueError):
+        # python-calamine niet geïnstalleerd of pandas < 2.2: terugval op openpyxl (read-only)
+        file.seek(0)
+        return pd.read_excel(file, dtype=str, engine="openpyxl", **kw)
+
+EXCEL_CACHE_DIR = os.path.join(os.getcwd(), ".cache", "excel")
+EXCEL_CACHE_KEEP = 10  # aantal werkboeken (mappen) dat op schijf bewaard blijft
+
+def prune_excel_cache(keep=EXCEL_CACHE_KEEP):
+    # alleen de recentst gebruikte werkboeken houden; oudere Parquet-kopieën (bedrijfsdata) opruimen
+    try:
+        folders = [e for e in os.scandir(EXCEL_CACHE_DIR) if e.is_dir()]
+    except OSError:
+        return
+    folders.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+    for e in folders[keep:]:
+        try:
+            for f in os.scandir(e.path):
+                os.remove(f.path)
+            os.rmdir(e.path)
+        except OSError:
+            pass
+
+@st.cache_data(show_spinner=False)
+def excel_sheet_names(data: bytes):
+    # alleen de werkboek-index lezen; geen sheet wordt geladen
+    try:
+        return pd.ExcelFile(io.BytesIO(data), engine="calamine").sheet_names
+    except (ImportError, ValueError):
+        return pd.ExcelFile(io.BytesIO(data), engine="openpyxl").sheet_names
+
+@st.cache_data(show_spinner=False)
+def excel_sheet_widths(data: bytes):
+    # aantal kopkolommen per sheet (voor de Bol-standaardsheet); openpyxl read-only leest per sheet
+    # alleen rij 1 (calamine zou elke sheet volledig laden)
+    wb = openpyxl.load_workbook(io.BytesIO(data), read_only=True)
+    try:
+        widths = {}
+        for ws in wb.worksheets:
+            head = next(ws.iter_rows(max_row=1, values_only=True), ())
+            filled = [i for i, v in enumerate(head) if v is not None and str(v).strip() != ""]
+            widths[ws.title] = filled[-1] + 1 if filled else 0
+        return widths
+    finally:
+        wb.close()
+
+@st.cache_data(show_spinner="Excel inlezen…")
+def read_excel_sheet(data: bytes, sheet: str):
+    # cache-key = inhoud van het bestand + gekozen sheet; alleen die sheet wordt geparsed
+    # daarnaast Parquet op schijf, zodat een herstart/redeploy niet opnieuw de xlsx parseert
+    folder = os.path.join(EXCEL_CACHE_DIR, hashlib.blake2b(data, digest_size=16).hexdigest())
+    path = os.path.join(folder, hashlib.blake2b(str(sheet).encode(), digest_size=8).hexdigest() + ".parquet")
+    if os.path.exists(path):
+        try:
+            d = pd.read_parquet(path)
+            os.utime(folder)  # mtime = laatst gebruikt, voor prune_excel_cache
+            return d.where(d.notna(), np.nan)  # None -> NaN zoals read_excel
+        except Exception:
+            pass
+    d = read_excel_any(io.BytesIO(data), sheet_name=sheet).rename(columns=lambda c: str(c).strip())
+    try:
+        os.makedirs(folder, exist_ok=True)
+        d.to_parquet(path + ".tmp", compression="zstd", index=False)
+        os.replace(path + ".tmp", path)  # pas na volledig schrijven zichtbaar
+        os.utime(folder)
+        prune_excel_cache()
+    except Exception:
+        pass
+    return d
 
 def build_base(df_raw, sel):
     ref_col = sel.get("ref")
@@ -88,7 +187,7 @@ def build_base(df_raw, sel):
     forecast_raw = to_num(df_raw[sel["forecast_min_4w"]])
     forecast_ceiled = np.ceil(forecast_raw).astype(int)
     df = pd.DataFrame({
-        "EAN": df_raw[sel["ean"]].astype(str).str.strip(),
+        "EAN": norm_ean(df_raw[sel["ean"]]),
         "Referentie": ref_series,
         "Titel": df_raw[sel["title"]].astype(str),
         "Vrije voorraad": to_num(df_raw[sel["stock"]]),
@@ -99,10 +198,51 @@ def build_base(df_raw, sel):
 
 # ============ Database ============ #
 DB_PATH = os.path.join(os.getcwd(), "app_data.db")
-def db(): return sqlite3.connect(DB_PATH, check_same_thread=False)
-
-def init_db():
-    c=db(); cur=c.cursor()
+@st.cache_resource(show_spinner=False)
+def get_conn():
+    # één verbinding per proces (gedeeld over sessies/reruns); pragma's gelden zolang die leeft
+    c = sqlite3.connect(DB_PATH, check_same_thread=False)
+    c.execute("PRAGMA journal_mode=WAL")
+    c.execute("PRAGMA synchronous=NORMAL")
+    c.execute("PRAGMA temp_store=MEMORY")
+    c.execute("PRAGMA cache_size=-65536")  # ~64 MB page cache
+    init_db(c)  # schema/migratie één keer per verbinding i.p.v. bij elke load/save
+    return c
+
+@st.cache_resource(show_spinner=False)
+def get_read_conn():
+    # aparte verbinding voor de loaders: door WAL zien ze alleen gecommitte data,
+    # nooit de openstaande transactie van een schrijvende sessie op get_conn()
+    get_conn()  # schema/migratie eerst
+    c = sqlite3.connect(DB_PATH, check_same_thread=False)
+    c.execute("PRAGMA query_only=ON")
+    c.execute("PRAGMA temp_store=MEMORY")
+    c.execute("PRAGMA cache_size=-65536")
+    return c
+
+def db(): return get_read_conn()
+
+@st.cache_resource(show_spinner=False)
+def get_write_lock():
+    # proces-breed, net als de verbinding: elke sessie draait op een eigen thread
+    return threading.Lock()
+
+@contextmanager
+def db_write():
+    # gedeelde verbinding = gedeelde transactie: schrijvers serialiseren, anders commit/rollback
+    # de ene sessie de half-afgemaakte writes van een andere; diff-read + DELETE/UPSERT zijn zo atomair
+    with get_write_lock():
+        c = get_conn()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            yield c
+        except BaseException:
+            c.rollback()
+            raise
+        c.commit()
+
+def init_db(c):
+    cur=c.cursor()
     cur.execute("""
     CREATE TABLE IF NOT EXISTS prices (
         EAN TEXT PRIMARY KEY,
@@ -133,6 +273,8 @@ def init_db():
         Leverancier TEXT DEFAULT '',
         Opmerking TEXT DEFAULT ''
     )""")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_incoming_ean ON incoming(EAN)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_incoming_eta ON incoming(ETA)")
     cur.execute("""
     CREATE TABLE IF NOT EXISTS base_data (
         EAN TEXT PRIMARY KEY,
@@ -153,140 +295,193 @@ def init_db():
             c.commit()
         except Exception:
             pass
-    c.close()
 
-def invalidate_caches():
+# loaders blijven gecachet tot een save/delete ze leegt; de TTL vangt wijzigingen buiten de app op
+LOADER_TTL = 300
+
+def invalidate_caches(*loaders):
+    # alleen de loaders van de gewijzigde tabel legen; build_inventory en de Excel-cache blijven staan
     try:
-        st.cache_data.clear()
+        for f in loaders:
+            f.clear()
     except Exception:
         pass
 
+def diff_rows(c, select_sql, rows):
+    # vergelijk met de huidige tabel (sleutel = eerste kolom): alleen nieuwe/gewijzigde rijen schrijven,
+    # en sleutels die niet meer voorkomen verwijderen; bij dubbele sleutels wint de laatste rij
+    rows = list({r[0]: r for r in rows}.values())
+    cur = {r[0]: r for r in c.execute(select_sql)}
+    changed = [r for r in rows if cur.get(r[0]) != r]
+    removed = [(k,) for k in cur.keys() - {r[0] for r in rows}]
+    return changed, removed
+
 # ---- prijzen ---- #
 PRICE_COLS = ["EAN","Referentie","Verkoopprijs","Inkoopprijs","Verzendkosten","Overige kosten","Leverancier","MOQ","Levertijd (dagen)"]
 
-@st.cache_data(ttl=0.1)
+@st.cache_data(ttl=LOADER_TTL, show_spinner=False)
 def load_prices():
-    init_db()
-    c=db()
-    df=pd.read_sql_query(
-        "SELECT EAN, Referentie, Verkoopprijs, Inkoopprijs, Verzendkosten, Overige_kosten AS 'Overige kosten', "
-        "Leverancier, MOQ, Levertijd_dagen AS 'Levertijd (dagen)' FROM prices", c)
-    c.close()
-    if df.empty: df=pd.DataFrame(columns=PRICE_COLS)
+    # kolommen liggen vast: direct uit de cursor i.p.v. read_sql_query-overhead
+    rows=db().execute(
+        "SELECT EAN, Referentie, Verkoopprijs, Inkoopprijs, Verzendkosten, Overige_kosten, "
+        "Leverancier, MOQ, Levertijd_dagen FROM prices").fetchall()
+    df=pd.DataFrame(rows, columns=PRICE_COLS)
     for col in ["Verkoopprijs","Inkoopprijs","Verzendkosten","Overige kosten","MOQ","Levertijd (dagen)"]:
         df[col]=pd.to_numeric(df[col], errors="coerce").fillna(0)
-    df["EAN"]=df["EAN"].astype(str).str.strip()
+    df["EAN"]=norm_ean(df["EAN"])
     df["Referentie"]=df.get("Referentie","").astype(str).str.strip()
     df["Leverancier"]=df.get("Leverancier","").astype(str)
     return df
 
 def save_prices_full(df_full: pd.DataFrame):
-    init_db()
     df_full = ensure_df(df_full, PRICE_COLS)
-    df_full["EAN"]=df_full["EAN"].astype(str).str.strip()
+    df_full["EAN"]=norm_ean(df_full["EAN"])
     df_full["Referentie"]=df_full["Referentie"].astype(str).str.strip()
     df_full["Leverancier"]=df_full["Leverancier"].astype(str).str.strip()
     for ccol in ["Verkoopprijs","Inkoopprijs","Verzendkosten","Overige kosten","MOQ","Levertijd (dagen)"]:
-        df_full[ccol]=pd.to_numeric(df_full[ccol].astype(str).str.replace(",",".",regex=False), errors="coerce").fillna(0)
-    c=db(); cur=c.cursor()
-    cur.execute("DELETE FROM prices")
-    cur.executemany("""
-        INSERT OR REPLACE INTO prices
-        (EAN, Referentie, Verkoopprijs, Inkoopprijs, Verzendkosten, Overige_kosten, Leverancier, MOQ, Levertijd_dagen)
-        VALUES (?,?,?,?,?,?,?,?,?)
-    """, [
-        (r.EAN, str(r["Referentie"] or ""), float(r["Verkoopprijs"]), float(r["Inkoopprijs"]),
-         float(r["Verzendkosten"]), float(r["Overige kosten"]), str(r["Leverancier"] or ""),
-         int(r["MOQ"] or 1), int(r["Levertijd (dagen)"] or 0))
-        for _, r in df_full.iterrows() if str(r["EAN"]).strip()!=""
-    ])
-    c.commit(); c.close()
-    invalidate_caches()
+        df_full[ccol]=to_num(df_full[ccol])
+    df_full = df_full[df_full["EAN"].str.len() > 0]
+    # parameters kolomsgewijs opbouwen (tolist -> Python int/float/str) i.p.v. per rij te converteren
+    rows = list(zip(
+        df_full["EAN"].tolist(), df_full["Referentie"].tolist(),
+        *(df_full[ccol].astype(float).tolist() for ccol in ["Verkoopprijs","Inkoopprijs","Verzendkosten","Overige kosten"]),
+        df_full["Leverancier"].tolist(),
+        df_full["MOQ"].mask(df_full["MOQ"] == 0, 1).astype(int).tolist(),  # MOQ 0 -> 1, zoals voorheen
+        df_full["Levertijd (dagen)"].astype(int).tolist(),
+    ))
+    with db_write() as c:  # één transactie: verwijderde EAN's weg, alleen gewijzigde rijen upserten
+        rows, removed = diff_rows(c, """
+            SELECT EAN, Referentie, Verkoopprijs, Inkoopprijs, Verzendkosten, Overige_kosten, Leverancier, MOQ, Levertijd_dagen
+            FROM prices""", rows)
+        c.executemany("DELETE FROM prices WHERE EAN=?", removed)
+        c.executemany("""
+            INSERT INTO prices
+            (EAN, Referentie, Verkoopprijs, Inkoopprijs, Verzendkosten, Overige_kosten, Leverancier, MOQ, Levertijd_dagen)
+            VALUES (?,?,?,?,?,?,?,?,?)
+            ON CONFLICT(EAN) DO UPDATE SET
+                Referentie=excluded.Referentie, Verkoopprijs=excluded.Verkoopprijs, Inkoopprijs=excluded.Inkoopprijs,
+                Verzendkosten=excluded.Verzendkosten, Overige_kosten=excluded.Overige_kosten,
+                Leverancier=excluded.Leverancier, MOQ=excluded.MOQ, Levertijd_dagen=excluded.Levertijd_dagen
+        """, rows)
+    invalidate_caches(load_prices)
 
 # ---- suppliers ---- #
-@st.cache_data(ttl=0.1)
+SUPPLIER_COLS = ["Naam","Locatie","Productietijd (dagen)","Levertijd zee (dagen)","Levertijd lucht (dagen)"]
+
+@st.cache_data(ttl=LOADER_TTL, show_spinner=False)
 def load_suppliers():
-    init_db()
-    c=db()
-    df=pd.read_sql_query(
-        "SELECT Naam, Locatie, Productietijd_dagen AS 'Productietijd (dagen)', "
-        "Levertijd_zee_dagen AS 'Levertijd zee (dagen)', Levertijd_lucht_dagen AS 'Levertijd lucht (dagen)' "
-        "FROM suppliers", c)
-    c.close()
-    if df.empty:
-        df=pd.DataFrame(columns=["Naam","Locatie","Productietijd (dagen)","Levertijd zee (dagen)","Levertijd lucht (dagen)"])
+    rows=db().execute(
+        "SELECT Naam, Locatie, Productietijd_dagen, Levertijd_zee_dagen, Levertijd_lucht_dagen FROM suppliers").fetchall()
+    df=pd.DataFrame(rows, columns=SUPPLIER_COLS)
     for col in ["Productietijd (dagen)","Levertijd zee (dagen)","Levertijd lucht (dagen)"]:
         df[col]=pd.to_numeric(df[col], errors="coerce").fillna(0).astype(int)
     df["Naam"]=df.get("Naam","").astype(str)
     return df
 
+@st.cache_data(ttl=LOADER_TTL, show_spinner=False)
+def supplier_options():
+    # keuzelijst voor de Leverancier-kolom: alleen de namen ophalen, geen DataFrame opbouwen
+    rows = db().execute("SELECT DISTINCT Naam FROM suppliers WHERE Naam IS NOT NULL ORDER BY Naam").fetchall()
+    return [""] + [str(r[0]) for r in rows]
+
 def save_suppliers(df):
-    init_db()
-    need=["Naam","Locatie","Productietijd (dagen)","Levertijd zee (dagen)","Levertijd lucht (dagen)"]
+    need=SUPPLIER_COLS
     df = ensure_df(df, need)
     df["Naam"]=df["Naam"].astype(str).str.strip()
     df["Locatie"]=df["Locatie"].astype(str).str.strip()
     for col in ["Productietijd (dagen)","Levertijd zee (dagen)","Levertijd lucht (dagen)"]:
         df[col]=pd.to_numeric(df[col], errors="coerce").fillna(0).astype(int)
-    c=db(); cur=c.cursor()
-    cur.execute("DELETE FROM suppliers")
-    cur.executemany(
-        "INSERT OR REPLACE INTO suppliers (Naam, Locatie, Productietijd_dagen, Levertijd_zee_dagen, Levertijd_lucht_dagen) VALUES (?,?,?,?,?)",
-        [(r.Naam, r.Locatie, int(r["Productietijd (dagen)"]), int(r["Levertijd zee (dagen)"]), int(r["Levertijd lucht (dagen)"]))
-         for _, r in df.iterrows() if r.Naam]
-    )
-    c.commit(); c.close()
-    invalidate_caches()
+    df = df[df["Naam"].str.len() > 0]
+    # kolommen als Python-lijsten zippen (tolist geeft int i.p.v. numpy.int64, dat sqlite3 niet bindt)
+    rows = list(zip(*(df[col].tolist() for col in need)))
+    with db_write() as c:  # één transactie; alleen verwijderde/gewijzigde leveranciers raken de tabel
+        rows, removed = diff_rows(c,
+            "SELECT Naam, Locatie, Productietijd_dagen, Levertijd_zee_dagen, Levertijd_lucht_dagen FROM suppliers", rows)
+        c.executemany("DELETE FROM suppliers WHERE Naam=?", removed)
+        c.executemany(
+            "INSERT OR REPLACE INTO suppliers (Naam, Locatie, Productietijd_dagen, Levertijd_zee_dagen, Levertijd_lucht_dagen) VALUES (?,?,?,?,?)",
+            rows
+        )
+    invalidate_caches(load_suppliers, supplier_options)
+
+def add_supplier_row(naam, locatie, prod, sea, air):
+    with db_write() as c:  # één transactie; bestaande naam (hoofdletterongevoelig) wordt vervangen
+        c.execute("DELETE FROM suppliers WHERE lower(Naam)=lower(?)", (naam,))
+        c.execute("INSERT INTO suppliers (Naam, Locatie, Productietijd_dagen, Levertijd_zee_dagen, Levertijd_lucht_dagen) VALUES (?,?,?,?,?)",
+                  (naam, str(locatie or "").strip(), int(prod or 0), int(sea or 0), int(air or 0)))
+    invalidate_caches(load_suppliers, supplier_options)
 
 def delete_supplier(name: str):
-    c=db(); cur=c.cursor()
-    cur.execute("DELETE FROM suppliers WHERE Naam=?", (name,))
-    c.commit(); c.close()
-    invalidate_caches()
+    with db_write() as c:
+        c.execute("DELETE FROM suppliers WHERE Naam=?", (name,))
+    invalidate_caches(load_suppliers, supplier_options)
 
 # ---- incoming ---- #
-@st.cache_data(ttl=0.1)
+INCOMING_COLS = ["id","EAN","Referentie","Aantal","ETA","Leverancier","Opmerking"]
+
+@st.cache_data(ttl=LOADER_TTL, show_spinner=False)
 def load_incoming():
-    init_db()
-    c=db()
-    df=pd.read_sql_query("SELECT id, EAN, Referentie, Aantal, ETA, Leverancier, Opmerking FROM incoming", c)
-    c.close()
-    if df.empty:
-        df=pd.DataFrame(columns=["id","EAN","Referentie","Aantal","ETA","Leverancier","Opmerking"])
+    rows=db().execute("SELECT id, EAN, Referentie, Aantal, ETA, Leverancier, Opmerking FROM incoming").fetchall()
+    df=pd.DataFrame(rows, columns=INCOMING_COLS)
+    df["EAN"]=norm_ean(df["EAN"])
+    # één keer naar datetime64 bij laden; filters vergelijken daarna gevectoriseerd
+    df["ETA"]=pd.to_datetime(df["ETA"], errors="coerce").dt.normalize()
     return df
 
+@st.cache_data(ttl=LOADER_TTL, show_spinner=False)
+def load_incoming_summary(today_iso: str):
+    # som + eerstvolgende ETA per EAN; filter en groepering in SQLite.
+    # date(ETA) is NULL voor onleesbare tekst: die telt als ongedateerd, net als NaT bij pd.to_datetime
+    rows=db().execute("""
+        SELECT TRIM(EAN), SUM(Aantal), MIN(date(ETA))
+        FROM incoming
+        WHERE ETA IS NULL OR ETA='' OR date(ETA) IS NULL OR date(ETA)>=?
+        GROUP BY TRIM(EAN)
+    """, (today_iso,)).fetchall()
+    df=pd.DataFrame(rows, columns=["EAN","Aantal","ETA"])
+    df["EAN"]=norm_ean(df["EAN"])
+    df["Aantal"]=pd.to_numeric(df["Aantal"], errors="coerce").fillna(0)
+    df["ETA"]=pd.to_datetime(df["ETA"], errors="coerce").dt.normalize()
+    # TRIM stript alleen spaties; na norm_ean kunnen groepen samenvallen -> opnieuw per EAN aggregeren
+    return df.groupby("EAN", as_index=False, sort=False).agg(Aantal=("Aantal","sum"), ETA=("ETA","min"))
+
+def iso_date(x) -> str:
+    # ETA altijd als YYYY-MM-DD opslaan (tekstvergelijking in SQL); onleesbaar/leeg -> "" = ongedateerd
+    if x is None or x == "":
+        return ""
+    ts = pd.to_datetime(x, errors="coerce")
+    return "" if pd.isna(ts) else ts.strftime("%Y-%m-%d")
+
+def add_incoming_rows(rows):
+    # rows: iterable van (ean, ref, qty, eta, leverancier, note); één executemany in één transactie
+    with db_write() as c:
+        c.executemany("INSERT INTO incoming (EAN, Referentie, Aantal, ETA, Leverancier, Opmerking) VALUES (?,?,?,?,?,?)",
+                      [(str(ean).strip(), str(ref or ""), int(qty or 0), iso_date(eta), str(leverancier or ""), str(note or ""))
+                       for ean, ref, qty, eta, leverancier, note in rows])
+    invalidate_caches(load_incoming, load_incoming_summary)
+
 def add_incoming_row(ean, ref, qty, eta, leverancier, note):
-    init_db()
-    c=db(); cur=c.cursor()
-    cur.execute("INSERT INTO incoming (EAN, Referentie, Aantal, ETA, Leverancier, Opmerking) VALUES (?,?,?,?,?,?)",
-                (str(ean).strip(), str(ref or ""), int(qty or 0), str(eta) if eta else "", str(leverancier or ""), str(note or "")))
-    c.commit(); c.close()
-    invalidate_caches()
+    add_incoming_rows([(ean, ref, qty, eta, leverancier, note)])
 
 def delete_incoming_row(row_id: int):
-    c=db(); cur=c.cursor()
-    cur.execute("DELETE FROM incoming WHERE id=?", (int(row_id),))
-    c.commit(); c.close()
-    invalidate_caches()
+    with db_write() as c:
+        c.execute("DELETE FROM incoming WHERE id=?", (int(row_id),))
+    invalidate_caches(load_incoming, load_incoming_summary)
 
 # ---- base_data ---- #
-@st.cache_data(ttl=0.1)
+@st.cache_data(ttl=LOADER_TTL, show_spinner=False)
 def load_base_df():
-    init_db()
-    c=db()
-    df=pd.read_sql_query("""
-        SELECT EAN, Referentie, Titel,
-               Vrije_voorraad AS 'Vrije voorraad',
-               Verkopen_Totaal AS 'Verkopen (Totaal)',
-               Verkoopprognose_min_Totaal4w AS 'Verkoopprognose min (Totaal 4w)',
-               Voorraad_dagen AS 'Voorraad dagen'
+    rows=db().execute("""
+        SELECT EAN, Referentie, Titel, Vrije_voorraad, Verkopen_Totaal,
+               Verkoopprognose_min_Totaal4w, Voorraad_dagen
         FROM base_data
-    """, c)
-    c.close()
-    return None if df.empty else df
+    """).fetchall()
+    if not rows: return None
+    df=pd.DataFrame(rows, columns=BASE_COLS)
+    df["EAN"]=norm_ean(df["EAN"])
+    return df
 
 def save_base_df(df):
-    init_db()
     df = ensure_df(df, BASE_COLS)
     cur_df = load_base_df()
     if cur_df is None: cur_df = pd.DataFrame(columns=["EAN"])
@@ -296,7 +491,7 @@ def save_base_df(df):
             return merged[col_new].where(~merged[col_new].isna(), merged.get(col_db))
         return merged.get(col_db)
     out = pd.DataFrame({
-        "EAN": merged["EAN"].astype(str).str.strip(),
+        "EAN": norm_ean(merged["EAN"]),
         "Referentie": (merged["Referentie"] if "Referentie" in merged.columns else merged.get("Referentie_db","")).astype(str),
         "Titel": (merged["Titel"] if "Titel" in merged.columns else merged.get("Titel_db","")).astype(str),
         "Vrije_voorraad": pd.to_numeric(pick("Vrije voorraad_db","Vrije voorraad"), errors="coerce").fillna(0),
@@ -304,22 +499,26 @@ def save_base_df(df):
         "Verkoopprognose_min_Totaal4w": pd.to_numeric(pick("Verkoopprognose min (Totaal 4w)_db","Verkoopprognose min (Totaal 4w)"), errors="coerce").fillna(0).astype(int),
         "Voorraad_dagen": pd.to_numeric(pick("Voorraad dagen_db","Voorraad dagen"), errors="coerce"),
     })
-    c=db(); cur=c.cursor()
-    cur.execute("DELETE FROM base_data")
-    cur.executemany("""
-        INSERT OR REPLACE INTO base_data
-        (EAN, Referentie, Titel, Vrije_voorraad, Verkopen_Totaal, Verkoopprognose_min_Totaal4w, Voorraad_dagen)
-        VALUES (?,?,?,?,?,?,?)
-    """, [
-        (r.EAN, str(r.Referentie or ""), str(r.Titel or ""),
-         float(r["Vrije_voorraad"] or 0),
-         float(r["Verkopen_Totaal"] or 0),
-         int(r["Verkoopprognose_min_Totaal4w"] or 0),
-         None if pd.isna(r["Voorraad_dagen"]) else int(r["Voorraad_dagen"]))
-        for _, r in out.iterrows() if str(r.EAN).strip()!=""
-    ])
-    c.commit(); c.close()
-    invalidate_caches()
+    out = out[out["EAN"].str.len() > 0]
+    # rijen uit kolom-lijsten i.p.v. iterrows (geen Series per rij); NaN voorraad dagen -> NULL
+    rows = list(zip(
+        out["EAN"].tolist(), out["Referentie"].tolist(), out["Titel"].tolist(),
+        out["Vrije_voorraad"].astype(float).tolist(),
+        out["Verkopen_Totaal"].astype(float).tolist(),
+        out["Verkoopprognose_min_Totaal4w"].tolist(),
+        [None if pd.isna(v) else int(v) for v in out["Voorraad_dagen"].tolist()],
+    ))
+    with db_write() as c:  # één transactie; alleen verwijderde/gewijzigde EAN's raken de tabel
+        rows, removed = diff_rows(c, """
+            SELECT EAN, Referentie, Titel, Vrije_voorraad, Verkopen_Totaal, Verkoopprognose_min_Totaal4w, Voorraad_dagen
+            FROM base_data""", rows)
+        c.executemany("DELETE FROM base_data WHERE EAN=?", removed)
+        c.executemany("""
+            INSERT OR REPLACE INTO base_data
+            (EAN, Referentie, Titel, Vrije_voorraad, Verkopen_Totaal, Verkoopprognose_min_Totaal4w, Voorraad_dagen)
+            VALUES (?,?,?,?,?,?,?)
+        """, rows)
+    invalidate_caches(load_base_df)
 
 # ============ Basisdata upload UI (eerste keer) ============ #
 if "base_df" not in st.session_state:
@@ -330,9 +529,9 @@ def upload_base_ui():
     up = st.file_uploader("Kies Excel", type=["xlsx"], key="basefile")
     if up:
         try:
-            sheets = read_excel_all(up)
-            sheet = st.selectbox("Kies sheet", list(sheets.keys()))
-            raw = sheets[sheet]
+            data = up.getvalue()
+            sheet = st.selectbox("Kies sheet", excel_sheet_names(data))
+            raw = read_excel_sheet(data, sheet)
             st.dataframe(raw.head(8), use_container_width=True)
             auto = auto_map(raw)
             def pick(lbl, key, optional=False):
@@ -351,6 +550,10 @@ def upload_base_ui():
             if st.button("✅ Vastleggen", type="primary", disabled=not ok):
                 if sel["ref"] == "— (geen) —": sel["ref"] = None
                 base = build_base(raw, sel)
+                # één regex over de hele kolom (Arrow-kernel), geen Python-lus per rij
+                invalid = base.loc[~base["EAN"].str.fullmatch(EAN_PATTERN), "EAN"]
+                if len(invalid):
+                    st.warning(f"{len(invalid)} EAN(s) zijn geen 8–14 cijfers, bijv.: {', '.join(invalid.head(5))}")
                 save_base_df(base)
                 st.session_state.base_df = base
                 st.session_state._base_hash = df_hash(base, REQ_ORDER)
@@ -363,27 +566,31 @@ def merged_inventory(prices_df=None):
     base = st.session_state.base_df
     if base is None: 
         return None
-    base = base.copy()
-    prices = prices_df if prices_df is not None else load_prices().copy()
-    incoming = load_incoming().copy()
-
-    base["EAN"] = base["EAN"].astype(str).str.strip()
-
-    # Som van toekomstige/ongedateerde inkomende aantallen + eerstvolgende ETA
-    if not incoming.empty:
-        incoming["ETA_dt"] = pd.to_datetime(incoming["ETA"], errors="coerce").dt.normalize()
-        today_ts = pd.Timestamp.today().normalize()
-        future = incoming[incoming["ETA_dt"].isna() | (incoming["ETA_dt"] >= today_ts)]
-
-        inc_sum = future.groupby("EAN")["Aantal"].sum(min_count=1).fillna(0)
-        eta_min = future.groupby("EAN")["ETA_dt"].min()
-
-    else:
-        inc_sum = pd.Series(dtype=float)
-        eta_min = pd.Series(dtype="datetime64[ns]")
-
-    base["Inkomende zending"] = base["EAN"].map(inc_sum).fillna(0).astype(int)
-    base["ETA (verwachte datum)"] = base["EAN"].map(eta_min)
+    prices = prices_df if prices_df is not None else load_prices()
+    # today in de loader-key: het toekomst-filter op ETA verloopt dagelijks
+    incoming = load_incoming_summary(pd.Timestamp.today().strftime("%Y-%m-%d"))
+    key = "|".join([frame_key(base), frame_key(prices, PRICE_COLS), frame_key(incoming)])
+    return build_inventory(key, base, prices, incoming)
+
+# _-argumenten worden door st.cache_data niet gehasht; `key` dekt hun inhoud
+# elke autosave geeft een nieuwe key: alleen de laatste paar merges in het geheugen houden
+@st.cache_data(show_spinner=False, max_entries=8, ttl=3600)
+def build_inventory(key, _base, _prices, _incoming):
+    base, prices, incoming = _base, _prices, _incoming
+    # incoming is al per EAN gesommeerd (load_incoming_summary); alleen uitlijnen op de base-EAN's
+    cats = pd.Index(base["EAN"].unique())
+    inc_sum = np.zeros(len(cats))
+    eta_min = np.full(len(cats), np.datetime64("NaT"), dtype="datetime64[ns]")
+    pos = cats.get_indexer(incoming["EAN"])
+    hit = pos >= 0  # zendingen voor EAN's die niet in base staan tellen niet mee
+    inc_sum[pos[hit]] = incoming["Aantal"].to_numpy(dtype=float)[hit]
+    eta_min[pos[hit]] = incoming["ETA"].to_numpy(dtype="datetime64[ns]")[hit]
+
+    b_codes = cats.get_indexer(base["EAN"])
+    base = base.assign(**{
+        "Inkomende zending": inc_sum[b_codes].astype(int),
+        "ETA (verwachte datum)": eta_min[b_codes],
+    })
 
     # Merge prijzen
     cols = ["Referentie","Verkoopprijs","Inkoopprijs","Verzendkosten","Overige kosten","Leverancier","MOQ","Levertijd (dagen)"]
@@ -396,26 +603,54 @@ def merged_inventory(prices_df=None):
         for ccol in cols:
             base[ccol] = "" if ccol in ["Leverancier","Referentie"] else 0
 
-    # Types
-    for ccol in ["Verkoopprijs","Inkoopprijs","Verzendkosten","Overige kosten","MOQ","Levertijd (dagen)"]:
-        base[ccol] = pd.to_numeric(base[ccol].astype(str).str.replace(",",".",regex=False), errors="coerce").fillna(0)
+    # Types: load_prices/save_prices_full leveren al numerieke kolommen; alleen NaN van de left-join vullen
+    num_cols = ["Verkoopprijs","Inkoopprijs","Verzendkosten","Overige kosten","MOQ","Levertijd (dagen)"]
+    base[num_cols] = base[num_cols].fillna(0).astype(float)
 
     if "Voorraad dagen" not in base.columns:
         base["Voorraad dagen"] = np.nan
 
-    base["Voorraadwaarde (verkoop)"] = base["Vrije voorraad"] * base["Verkoopprijs"].fillna(0)
-    base["Totale kostprijs per stuk"] = base["Inkoopprijs"].fillna(0) + base["Verzendkosten"].fillna(0) + base["Overige kosten"].fillna(0)
-    return base
+    # prijs-kolommen zijn hierboven al gevuld; afgeleide kolommen in één assign
+    return base.assign(**{
+        "Voorraadwaarde (verkoop)": base["Vrije voorraad"] * base["Verkoopprijs"],
+        "Totale kostprijs per stuk": base["Inkoopprijs"] + base["Verzendkosten"] + base["Overige kosten"],
+    })
+
+# ============ Status (gevectoriseerd) ============ #
+STATUS_ORDER = ["Out of stock","At risk","Healthy","Overstock"]
+STATUS_LABELS = np.array(STATUS_ORDER)
+
+def classify_status_vec(df, over_units):
+    stock = to_num(df["Vrije voorraad"]).to_numpy(dtype=float) + to_num(df["Inkomende zending"]).to_numpy(dtype=float)
+    f = to_num(df["Verkoopprognose min (Totaal 4w)"]).to_numpy(dtype=float)
+    # codes = index in STATUS_ORDER; toewijzen van laag naar hoog voorrang, zonder if/else per rij
+    code = np.full(len(stock), 2, dtype=np.int8)
+    code[stock >= f + over_units] = 3
+    code[stock < f] = 1
+    code[stock <= 0] = 0
+    return np.take(STATUS_LABELS, code)
+
+@st.cache_resource(show_spinner=False)
+def status_chart(counts):
+    # counts: aantallen in STATUS_ORDER-volgorde; spec alleen opnieuw opbouwen als die wijzigen
+    chart_df = pd.DataFrame({"Status":STATUS_ORDER,"Aantal":list(counts)})
+    color_scale = alt.Scale(domain=STATUS_ORDER, range=["#E74C3C", "#F39C12", "#27AE60", "#34495E"])
+    return (alt.Chart(chart_df).mark_bar().encode(
+        x=alt.X("Status:N", sort=STATUS_ORDER, title="Status"),
+        y=alt.Y("Aantal:Q", title="Aantal"),
+        color=alt.Color("Status:N", scale=color_scale, legend=None),
+    ).properties(height=280))
 
 # ============ Sidebar ============ #
+PAGES = ["Home", "Inventory", "Suppliers", "Incoming"]
+ICONS = {"Home":"🏠","Inventory":"📦","Suppliers":"👥","Incoming":"⬇️"}
+PAGE_LABELS = {p: f"{ICONS[p]}  {p}" for p in PAGES}
+
 with st.sidebar:
     st.markdown('<div class="sidebar-title">Menu</div>', unsafe_allow_html=True)
-    pages = ["Home", "Inventory", "Suppliers", "Incoming"]
-    icons = {"Home":"🏠","Inventory":"📦","Suppliers":"👥","Incoming":"⬇️"}
     choice = st.session_state.get("_page","Home")
-    for p in pages:
-        label = f"{icons[p]}  {p}"
-        if st.button(label, key=f'nav_{p}', use_container_width=True):
+    for p in PAGES:
+        if st.button(PAGE_LABELS[p], key=f'nav_{p}', use_container_width=True):
             choice = p
     st.session_state["_page"] = choice
 
@@ -426,8 +661,6 @@ if "_prices_hash" not in st.session_state:
     st.session_state._prices_hash = df_hash(st.session_state.prices_df, PRICE_COLS)
 if "_base_hash" not in st.session_state:
     st.session_state._base_hash = df_hash(st.session_state.base_df, BASE_COLS) if st.session_state.base_df is not None else "empty"
-if "last_inventory_df" not in st.session_state:
-    st.session_state.last_inventory_df = merged_inventory(prices_df=st.session_state.prices_df)
 
 # Debounce-buffers
 if "_inv_last_saved_hash" not in st.session_state:
@@ -446,10 +679,12 @@ def upload_bol_forecast_ui():
     if not up:
         return
     try:
-        sheets = read_excel_all(up)
-        default_sheet = max(sheets.items(), key=lambda kv: kv[1].shape[1])[0]
-        sheet = st.selectbox("Kies sheet", list(sheets.keys()), index=list(sheets.keys()).index(default_sheet))
-        raw = sheets[sheet]
+        data = up.getvalue()
+        names = excel_sheet_names(data)
+        widths = excel_sheet_widths(data)
+        default_sheet = max(names, key=lambda n: widths.get(n, 0))  # breedste sheet, bepaald uit de kopregels
+        sheet = st.selectbox("Kies sheet", names, index=names.index(default_sheet))
+        raw = read_excel_sheet(data, sheet)
         st.caption(f"Voorbeeld (eerste 8 rijen) — {raw.shape[0]} rijen, {raw.shape[1]} kolommen")
         st.dataframe(raw.head(8), use_container_width=True)
 
@@ -467,7 +702,7 @@ def upload_bol_forecast_ui():
 
         if st.button("📥 Gegevens inladen", type="primary"):
             df = pd.DataFrame({
-                "EAN": raw[picks["ean"]].astype(str).str.strip(),
+                "EAN": norm_ean(raw[picks["ean"]]),
                 "Verkoopprognose min (Totaal 4w)": to_int(raw[picks["forecast_min_4w"]]),
                 "Voorraad dagen": pd.to_numeric(raw[picks["stock_days"]], errors="coerce"),
             })
@@ -483,7 +718,7 @@ def upload_bol_forecast_ui():
                     return merged[new_col].where(~merged[new_col].isna(), merged.get(old_col))
                 return merged.get(old_col)
 
-            out = merged.copy()
+            out = merged
             for c in BASE_COLS:
                 if c not in out.columns:
                     out[c] = np.nan if c == "Voorraad dagen" else 0
@@ -492,9 +727,8 @@ def upload_bol_forecast_ui():
             out = ensure_df(out, BASE_COLS)
 
             save_base_df(out)
-            st.session_state.base_df = out.copy()
+            st.session_state.base_df = out
             st.session_state._base_hash = df_hash(out, BASE_COLS)
-            st.session_state.last_inventory_df = merged_inventory(prices_df=st.session_state.prices_df)
             st.success("Prognose & Voorraad dagen ingeladen ✅")
     except Exception as e:
         st.error(f"Upload mislukt: {e}")
@@ -509,31 +743,19 @@ if choice == "Home":
     if inv is None: st.stop()
 
     over_units = int(st.secrets.get("over_units_default", 30))
-    inv["Status"] = inv.apply(lambda r: (
-        "Out of stock" if (float(r.get("Vrije voorraad",0))+float(r.get("Inkomende zending",0)))<=0 else
-        ("At risk" if (float(r.get("Vrije voorraad",0))+float(r.get("Inkomende zending",0)))<
-         float(r.get("Verkoopprognose min (Totaal 4w)",0)) else
-         ("Overstock" if (float(r.get("Vrije voorraad",0))+float(r.get("Inkomende zending",0)))>=
-          float(r.get("Verkoopprognose min (Totaal 4w)",0))+over_units else "Healthy"))
-    ), axis=1)
+    inv["Status"] = pd.Categorical(classify_status_vec(inv, over_units), categories=STATUS_ORDER, ordered=True)
+
+    counts = inv["Status"].value_counts().reindex(STATUS_ORDER, fill_value=0).astype(int)
+    total_value = float(inv["Voorraadwaarde (verkoop)"].to_numpy(dtype=float, na_value=0.0).sum())
 
     c1,c2,c3,c4 = st.columns(4)
-    c1.metric("Totale voorraadwaarde (verkoop)", f"€ {inv['Voorraadwaarde (verkoop)'].sum():,.2f}")
+    c1.metric("Totale voorraadwaarde (verkoop)", f"€ {total_value:,.2f}")
     c2.metric("Artikelen", len(inv))
-    c3.metric("Out of stock", int((inv["Status"]=="Out of stock").sum()))
-    c4.metric("At risk", int((inv["Status"]=="At risk").sum()))
+    c3.metric("Out of stock", int(counts["Out of stock"]))
+    c4.metric("At risk", int(counts["At risk"]))
 
     st.markdown("**Voorraad gezondheid**")
-    order = ["Out of stock","At risk","Healthy","Overstock"]
-    counts = inv["Status"].value_counts().reindex(order).fillna(0)
-    chart_df = pd.DataFrame({"Status":order,"Aantal":[int(counts.get(s,0)) for s in order]})
-    color_scale = alt.Scale(domain=order, range=["#E74C3C", "#F39C12", "#27AE60", "#34495E"])
-    chart = (alt.Chart(chart_df).mark_bar().encode(
-        x=alt.X("Status:N", sort=order, title="Status"),
-        y=alt.Y("Aantal:Q", title="Aantal"),
-        color=alt.Color("Status:N", scale=color_scale, legend=None),
-    ).properties(height=280))
-    st.altair_chart(chart, use_container_width=True)
+    st.altair_chart(status_chart(tuple(counts.tolist())), use_container_width=True)
 
 elif choice == "Inventory":
     st.header("Inventory")
@@ -550,7 +772,7 @@ elif choice == "Inventory":
 
     # Buffer verversen uit merge (zodat de inkomende zending + ETA kloppen)
     st.session_state.last_inventory_df = merged_inventory(prices_df=st.session_state.prices_df)
-    inv_buffer = st.session_state.last_inventory_df.copy()
+    inv_buffer = st.session_state.last_inventory_df
 
     INV_COLS = [
         "EAN","Referentie","Titel","Vrije voorraad",
@@ -561,9 +783,9 @@ elif choice == "Inventory":
     for c in INV_COLS:
         if c not in inv_buffer.columns:
             inv_buffer[c] = "" if c in ["Referentie","Titel","Leverancier"] else (np.nan if c in ["Voorraad dagen","ETA (verwachte datum)"] else 0)
-    inv_view = inv_buffer[INV_COLS].copy()
+    inv_view = inv_buffer[INV_COLS]
 
-    options = [""] + sorted(set(load_suppliers().get("Naam", pd.Series(dtype=str)).dropna().astype(str).tolist()))
+    options = supplier_options()
     col_cfg = {
         "Leverancier": st.column_config.SelectboxColumn("Leverancier", options=options, required=False),
         "EAN": st.column_config.TextColumn("EAN"),
@@ -594,10 +816,10 @@ elif choice == "Inventory":
     # Normaliseren (alleen bewerkbare velden)
     edited = ensure_df(edited, INV_COLS)
     for c in ["Verkoopprijs","Inkoopprijs","Verzendkosten","Overige kosten"]:
-        edited[c] = pd.to_numeric(edited[c].astype(str).str.replace(",",".",regex=False), errors="coerce").fillna(0.0)
+        edited[c] = to_num(edited[c])
     for c in ["Vrije voorraad","Verkoopprognose min (Totaal 4w)","MOQ","Levertijd (dagen)"]:
         edited[c] = pd.to_numeric(edited[c], errors="coerce").fillna(0).astype(int)
-    edited["EAN"] = edited["EAN"].astype(str).str.strip()
+    edited["EAN"] = norm_ean(edited["EAN"])
     edited["Referentie"] = edited["Referentie"].astype(str).str.strip()
     edited["Titel"] = edited["Titel"].astype(str).str.strip()
     edited["Leverancier"] = edited["Leverancier"].astype(str).str.strip()
@@ -606,7 +828,7 @@ elif choice == "Inventory":
     edited["Inkomende zending"] = pd.to_numeric(edited["Inkomende zending"], errors="coerce").fillna(0).astype(int)
 
     # Buffer bijwerken
-    st.session_state.last_inventory_df = edited.copy()
+    st.session_state.last_inventory_df = edited
 
     # Splits voor opslag (afgeleide kolommen NIET opslaan)
     base_out = edited[["EAN","Referentie","Titel","Vrije voorraad","Verkoopprognose min (Totaal 4w)","Voorraad dagen"]].copy()
@@ -620,7 +842,7 @@ elif choice == "Inventory":
         base_out = base_out[["EAN","Referentie","Titel","Vrije voorraad","Verkopen (Totaal)",
                              "Verkoopprognose min (Totaal 4w)","Voorraad dagen"]]
 
-    prices_out = edited[["EAN","Referentie","Verkoopprijs","Inkoopprijs","Verzendkosten","Overige kosten","Leverancier","MOQ","Levertijd (dagen)"]].copy()
+    prices_out = edited[["EAN","Referentie","Verkoopprijs","Inkoopprijs","Verzendkosten","Overige kosten","Leverancier","MOQ","Levertijd (dagen)"]]
 
     base_out   = base_out[base_out["EAN"].str.len() > 0]
     prices_out = prices_out[prices_out["EAN"].str.len() > 0]
@@ -640,12 +862,12 @@ elif choice == "Inventory":
             changed = False
             if new_base_hash != st.session_state._base_hash:
                 save_base_df(base_out)
-                st.session_state.base_df    = base_out.copy()
+                st.session_state.base_df    = base_out
                 st.session_state._base_hash = new_base_hash
                 changed = True
             if new_prices_hash != st.session_state._prices_hash:
                 save_prices_full(prices_out)
-                st.session_state.prices_df    = prices_out.copy()
+                st.session_state.prices_df    = prices_out
                 st.session_state._prices_hash = new_prices_hash
                 changed = True
             if changed:
@@ -666,19 +888,13 @@ elif choice == "Suppliers":
             if not naam.strip():
                 st.warning("Naam is verplicht.")
             else:
-                exists = (sup["Naam"].str.lower()==naam.strip().lower()).any()
-                new_row = {"Naam":naam.strip(),"Locatie":locatie,
-                           "Productietijd (dagen)":int(prod),
-                           "Levertijd zee (dagen)":int(sea),
-                           "Levertijd lucht (dagen)":int(air)}
-                if exists:
-                    sup.loc[sup["Naam"].str.lower()==naam.strip().lower(), :] = new_row
-                else:
-                    sup = pd.concat([sup, pd.DataFrame([new_row])], ignore_index=True)
-                save_suppliers(sup); st.success("Leverancier opgeslagen.")
+                add_supplier_row(naam.strip(), locatie, prod, sea, air)
+                sup = load_suppliers()  # editor hieronder toont direct de nieuwe rij
+                st.success("Leverancier opgeslagen.")
     st.subheader("Leverancierslijst (automatisch opslaan)")
     ret_sup = st.data_editor(sup, num_rows="dynamic", use_container_width=True, key="sup_editor")
-    save_suppliers(ret_sup)
+    if df_hash(ret_sup) != df_hash(sup):  # alleen schrijven als de editor echt iets wijzigde
+        save_suppliers(ret_sup)
 
 elif choice == "Incoming":
     st.header("Incoming")
@@ -701,10 +917,8 @@ elif choice == "Incoming":
     if inc.empty:
         st.info("Nog geen inkomende zendingen.")
     else:
-        inc_disp = inc.copy()
-        try: inc_disp["ETA"] = pd.to_datetime(inc_disp["ETA"], errors="coerce").dt.date
-        except Exception: pass
-        st.dataframe(inc_disp, use_container_width=True)
+        # ETA blijft datetime64 (uit load_incoming); DateColumn toont alleen de datum
+        st.dataframe(inc, use_container_width=True, column_config={"ETA": st.column_config.DateColumn("ETA")})
         st.markdown("Rij verwijderen")
         del_id = st.number_input("ID (zie kolom 'id')", min_value=0, step=1, value=0)
         if st.button("🗑️ Verwijder ID"):